@@ -5,42 +5,211 @@ Checks multiple potential issues causing connection timeouts
 """
 
 import os
+import re
 import sys
+import io
 import json
-import requests
+import asyncio
+import contextvars
+import importlib.util
+import inspect
+import socket
+import httpx
 import time
 from pathlib import Path
 
-def check_vercel_status():
+# Buffer for the check running in the current task, so concurrent checks don't interleave output
+_OUTPUT = contextvars.ContextVar("diagnosis_output", default=None)
+
+class _TaskStdout:
+    """stdout proxy that routes writes to the current check's buffer"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        buffer = _OUTPUT.get()
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+# HTTP/2 lets the main-site and API probes multiplex on one connection; needs httpx[http2]
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Separate connect/read budgets so a slow handshake fails fast without cutting off slow responses
+TIMEOUT = httpx.Timeout(7.0, connect=3.0)
+
+# Transient gateway errors and failed or dropped connections are retried with exponential backoff;
+# timeouts are not, so a stalled handshake costs a single connect budget
+RETRY_ATTEMPTS = 2
+RETRY_BACKOFF = 0.3  # seconds, doubled after each attempt
+RETRY_STATUSES = {502, 503, 504}
+
+def create_client():
+    """Shared async client so probes against the same host reuse pooled connections"""
+    transport = httpx.AsyncHTTPTransport(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5)
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=TIMEOUT,
+        headers={"User-Agent": "vercel-diag/1"}
+    )
+
+async def request_with_retry(client, method, url, **kwargs):
+    """Send a request, retrying gateway errors, failed connects and resets (not timeouts) with backoff"""
+    stream = kwargs.pop("stream", False)
+    follow_redirects = kwargs.pop("follow_redirects", httpx.USE_CLIENT_DEFAULT)
+    for attempt in range(RETRY_ATTEMPTS + 1):
+        last_attempt = attempt == RETRY_ATTEMPTS
+        try:
+            request = client.build_request(method, url, **kwargs)
+            response = await client.send(request, stream=stream, follow_redirects=follow_redirects)
+        except (httpx.ConnectError, httpx.ReadError, httpx.RemoteProtocolError):
+            if last_attempt:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+            await response.aclose()
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+# Pending/finished DNS lookups keyed by hostname, so each host is resolved once per run
+_RESOLVED = {}
+
+async def resolve_host(host):
+    """Resolve a hostname once; concurrent callers await the same lookup"""
+    lookup = _RESOLVED.get(host)
+    if lookup is None:
+        loop = asyncio.get_running_loop()
+        lookup = asyncio.ensure_future(loop.getaddrinfo(host, 443, type=socket.SOCK_STREAM))
+        _RESOLVED[host] = lookup
+    addresses = await lookup
+    return addresses[0][4][0]
+
+async def pinned_request(client, method, url, **kwargs):
+    """Send a request to the pre-resolved address, keeping Host and SNI on the real hostname"""
+    url = httpx.URL(url)
+    follow_redirects = kwargs.pop("follow_redirects", False)
+    try:
+        ip = await resolve_host(url.host)
+    except OSError:
+        # Let the request itself surface the resolution error
+        return await request_with_retry(client, method, url, follow_redirects=follow_redirects, **kwargs)
+    
+    headers = {"Host": url.host, **kwargs.pop("headers", {})}
+    response = await request_with_retry(
+        client,
+        method,
+        url.copy_with(host=ip),
+        headers=headers,
+        extensions={"sni_hostname": url.host},
+        **kwargs
+    )
+    if not (follow_redirects and response.is_redirect):
+        return response
+    
+    # Only the first hop is pinned: httpx would carry the SNI override over to a redirect
+    # onto another host and fail its certificate check, so follow the rest unpinned
+    await response.aclose()
+    if (response.status_code in (302, 303) and method != "HEAD") or (response.status_code == 301 and method == "POST"):
+        # Same method rewrite httpx applies; the body doesn't survive it
+        method = "GET"
+        for key in ("content", "data", "files", "json"):
+            kwargs.pop(key, None)
+    return await request_with_retry(
+        client,
+        method,
+        url.join(response.headers["Location"]),
+        headers={k: v for k, v in headers.items() if k != "Host"},
+        follow_redirects=True,
+        **kwargs
+    )
+
+# On-disk cache for the Vercel status document, so rapid re-runs skip the round trip
+STATUS_CACHE_FILE = Path(".vercel_diag_cache.json")
+STATUS_CACHE_TTL = 300  # seconds, used when the server sends no max-age
+
+def load_status_cache():
+    """Load cached responses, ignoring a missing, corrupt or malformed cache file"""
+    try:
+        with open(STATUS_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def save_status_cache(cache):
+    """Persist cached responses; caching is best effort"""
+    try:
+        with open(STATUS_CACHE_FILE, 'w') as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+async def fetch_json_cached(client, url):
+    """GET a JSON document, serving it from cache while fresh and revalidating with its ETag"""
+    cache = load_status_cache()
+    entry = cache.get(url)
+    if not (isinstance(entry, dict) and "body" in entry and isinstance(entry.get("expires"), (int, float))):
+        entry = None  # absent or malformed; treat as a miss
+    if entry and time.time() < entry["expires"]:
+        return 200, entry["body"]
+    
+    headers = {}
+    if entry and isinstance(entry.get("etag"), str):
+        headers["If-None-Match"] = entry["etag"]
+    
+    response = await request_with_retry(client, "GET", url, headers=headers)
+    if response.status_code == 304 and entry:
+        body = entry["body"]
+    elif response.status_code == 200:
+        body = response.json()
+    else:
+        return response.status_code, None
+    
+    cache_control = response.headers.get("Cache-Control", "")
+    if "no-store" not in cache_control:
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        ttl = int(max_age.group(1)) if max_age else STATUS_CACHE_TTL
+        cache[url] = {
+            "body": body,
+            "etag": response.headers.get("ETag") or (entry or {}).get("etag"),
+            "expires": time.time() + ttl
+        }
+        save_status_cache(cache)
+    
+    return 200, body
+
+async def check_vercel_status(client):
     """Check Vercel service status"""
     try:
-        response = requests.get("https://vercel-status.com/api/v2/status.json", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
+        status_code, data = await fetch_json_cached(client, "https://vercel-status.com/api/v2/status.json")
+        if status_code == 200:
             status = data.get("status", {}).get("indicator", "unknown")
             print(f"✅ Vercel Status: {status}")
             return status == "none"  # "none" means no issues
         else:
-            print(f"⚠️  Could not check Vercel status: {response.status_code}")
+            print(f"⚠️  Could not check Vercel status: {status_code}")
             return False
     except Exception as e:
         print(f"❌ Error checking Vercel status: {e}")
         return False
 
-def test_domain_resolution():
+async def test_domain_resolution(client):
     """Test if the domain resolves correctly"""
-    import socket
-    
     domain = "statistical-webapp-dify.vercel.app"
     try:
-        ip = socket.gethostbyname(domain)
+        ip = await resolve_host(domain)
         print(f"✅ Domain resolves to: {ip}")
         return True
     except socket.gaierror as e:
         print(f"❌ Domain resolution failed: {e}")
         return False
 
-def check_api_function():
+async def check_api_function(client):
     """Test the API function directly"""
     api_url = "https://statistical-webapp-dify.vercel.app/api/dashscope"
     
@@ -50,8 +219,9 @@ def check_api_function():
     try:
         # Test with OPTIONS request first (CORS preflight)
         print("1. Testing OPTIONS request...")
-        response = requests.options(api_url, timeout=10)
+        response = await pinned_request(client, "OPTIONS", api_url)
         print(f"   Status: {response.status_code}")
+        print(f"   Protocol: {response.http_version}")
         print(f"   Headers: {dict(response.headers)}")
         
         # Test with POST request
@@ -64,11 +234,12 @@ def check_api_function():
             "parameters": {"temperature": 0.7}
         }
         
-        response = requests.post(
+        response = await pinned_request(
+            client,
+            "POST",
             api_url, 
             json=test_payload, 
-            headers={"Content-Type": "application/json"},
-            timeout=10
+            headers={"Content-Type": "application/json"}
         )
         
         print(f"   Status: {response.status_code}")
@@ -77,17 +248,17 @@ def check_api_function():
         
         return response.status_code == 200
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("   ❌ Request timed out")
         return False
-    except requests.exceptions.ConnectionError as e:
+    except httpx.TransportError as e:
         print(f"   ❌ Connection error: {e}")
         return False
     except Exception as e:
         print(f"   ❌ Error: {e}")
         return False
 
-def check_main_site():
+async def check_main_site(client):
     """Test the main site"""
     main_url = "https://statistical-webapp-dify.vercel.app"
     
@@ -95,10 +266,17 @@ def check_main_site():
     print("-" * 50)
     
     try:
-        response = requests.get(main_url, timeout=10)
+        # Status and headers are all we report, so skip downloading the page body
+        response = await pinned_request(client, "HEAD", main_url, follow_redirects=True)
+        if response.status_code in (405, 501):
+            # Server refuses HEAD; stream a GET and close it once headers arrive
+            response = await pinned_request(client, "GET", main_url, follow_redirects=True, stream=True)
+            await response.aclose()
+        
         print(f"Status: {response.status_code}")
         print(f"Content-Type: {response.headers.get('Content-Type', 'Unknown')}")
-        print(f"Content-Length: {len(response.content)} bytes")
+        content_length = response.headers.get('Content-Length')
+        print(f"Content-Length: {f'{content_length} bytes' if content_length else 'Unknown'}")
         
         if response.status_code == 200:
             print("✅ Main site loads successfully")
@@ -107,10 +285,10 @@ def check_main_site():
             print(f"❌ Main site returned status {response.status_code}")
             return False
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("❌ Main site request timed out")
         return False
-    except requests.exceptions.ConnectionError as e:
+    except httpx.TransportError as e:
         print(f"❌ Main site connection error: {e}")
         return False
     except Exception as e:
@@ -198,6 +376,38 @@ def suggest_solutions():
     print("   • Try accessing from different location/network")
     print("   • Use VPN if necessary")
 
+async def run_check(name, check_func, client):
+    """Run a single check, capturing its output; blocking checks run in a worker thread"""
+    buffer = io.StringIO()
+    _OUTPUT.set(buffer)
+    try:
+        if inspect.iscoroutinefunction(check_func):
+            result = await check_func(client)
+        else:
+            result = await asyncio.to_thread(check_func)
+    except Exception as e:
+        print(f"❌ {name} check failed: {e}")
+        result = False
+    return result, buffer.getvalue()
+
+async def run_checks(checks):
+    """Run all checks concurrently and print their output in the original order"""
+    stdout = sys.stdout
+    sys.stdout = _TaskStdout(stdout)
+    try:
+        async with create_client() as client:
+            outcomes = await asyncio.gather(
+                *(run_check(name, check_func, client) for name, check_func in checks)
+            )
+    finally:
+        sys.stdout = stdout
+    
+    results = {}
+    for (name, _), (result, output) in zip(checks, outcomes):
+        print(output, end="")
+        results[name] = result
+    return results
+
 def main():
     """Main diagnostic function"""
     print("🔍 COMPREHENSIVE VERCEL DEPLOYMENT DIAGNOSIS")
@@ -213,13 +423,7 @@ def main():
         ("Build Output", check_build_output)
     ]
     
-    results = {}
-    for name, check_func in checks:
-        try:
-            results[name] = check_func()
-        except Exception as e:
-            print(f"❌ {name} check failed: {e}")
-            results[name] = False
+    results = asyncio.run(run_checks(checks))
     
     # Summary
     print(f"\n📊 DIAGNOSIS SUMMARY")
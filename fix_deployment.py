@@ -7,8 +7,19 @@ Helps diagnose and fix common deployment issues
 import os
 import sys
 import json
+import mmap
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def load_json(file_path):
+    """Parse a JSON file, using orjson when it is installed"""
+    data = Path(file_path).read_bytes()
+    return orjson.loads(data) if orjson else json.loads(data)
+
 def check_file_exists(file_path, description):
     """Check if a file exists and report status"""
     if os.path.exists(file_path):
@@ -25,13 +36,14 @@ def check_file_content(file_path, search_terms, description):
         return False
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        found = set()
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > 0:  # mmap can't map an empty file
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                    # A substring search per term on the mapped bytes; no decoded copy of the file
+                    found = {term for term in search_terms if content.find(term.encode('utf-8')) != -1}
         
-        issues = []
-        for term in search_terms:
-            if term in content:
-                issues.append(f"Found '{term}' in {file_path}")
+        issues = [f"Found '{term}' in {file_path}" for term in search_terms if term in found]
         
         if issues:
             print(f"⚠️  {description}:")
@@ -86,8 +98,7 @@ def main():
     print("-" * 40)
     
     try:
-        with open("vercel.json", 'r') as f:
-            vercel_config = json.load(f)
+        vercel_config = load_json("vercel.json")
         
         if "functions" in vercel_config:
             print("✅ Vercel functions configuration found")
@@ -129,8 +140,7 @@ def main():
     print("-" * 40)
     
     try:
-        with open("package.json", 'r') as f:
-            package_config = json.load(f)
+        package_config = load_json("package.json")
         
         scripts = package_config.get("scripts", {})
         if "build" in scripts:
@@ -7,99 +7,181 @@ Analyzes screenshots for visual patterns, colors, and basic image characteristic
 import os
 import sys
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from PIL import Image, ImageStat
-import matplotlib.pyplot as plt
-from collections import Counter
+from PIL import Image
 
-def analyze_image_colors(image_path):
-    """Analyze color distribution in the image"""
+try:
+    from numba import njit, prange, get_num_threads, set_num_threads
+except ImportError:
+    njit = None
+
+# Longest edge analyzed at full detail; larger screenshots are box-downscaled first
+MAX_ANALYSIS_SIZE = 2000
+
+# Below this grayscale std the image is treated as uniform and regions are not reported
+UNIFORM_STD_THRESHOLD = 2.0
+
+# Thumbnails/icons smaller than this skip the dominant-color table
+SMALL_IMAGE_PIXELS = 10_000
+
+REGION_NAMES = ('top_left', 'top_right', 'bottom_left', 'bottom_right', 'center')
+
+def region_bounds(height, width):
+    """(y0, y1, x0, x1) bounds of each region in REGION_NAMES"""
+    return np.array([
+        (0, height//2, 0, width//2),
+        (0, height//2, width//2, width),
+        (height//2, height, 0, width//2),
+        (height//2, height, width//2, width),
+        (height//4, 3*height//4, width//4, 3*width//4)
+    ], dtype=np.int64)
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _fused_image_stats(rgb, bounds, n_chunks):
+        """Channel/gray histograms and region sums in one parallel pass over the pixels"""
+        height, width = rgb.shape[0], rgb.shape[1]
+        rows_per_chunk = (height + n_chunks - 1) // n_chunks
+        
+        # Per-chunk partials, reduced after the parallel loop
+        channel_hist = np.zeros((n_chunks, 3, 256), dtype=np.int64)
+        gray_hist = np.zeros((n_chunks, 256), dtype=np.int64)
+        region_sums = np.zeros((n_chunks, len(bounds), 3), dtype=np.int64)
+        
+        for chunk in prange(n_chunks):
+            for y in range(chunk * rows_per_chunk, min((chunk + 1) * rows_per_chunk, height)):
+                for x in range(width):
+                    r, g, b = rgb[y, x, 0], rgb[y, x, 1], rgb[y, x, 2]
+                    channel_hist[chunk, 0, r] += 1
+                    channel_hist[chunk, 1, g] += 1
+                    channel_hist[chunk, 2, b] += 1
+                    
+                    # Same fixed-point ITU-R 601-2 luma as PIL's convert('L')
+                    luma = (np.int64(r) * 19595 + np.int64(g) * 38470 + np.int64(b) * 7471 + 0x8000) >> 16
+                    gray_hist[chunk, luma] += 1
+                    
+                    for i in range(len(bounds)):
+                        if bounds[i, 0] <= y < bounds[i, 1] and bounds[i, 2] <= x < bounds[i, 3]:
+                            region_sums[chunk, i, 0] += r
+                            region_sums[chunk, i, 1] += g
+                            region_sums[chunk, i, 2] += b
+        
+        return channel_hist.sum(axis=0), gray_hist.sum(axis=0), region_sums.sum(axis=0)
+
+def image_stats(rgb):
+    """Histograms and per-region mean RGB for an RGB pixel array (fused via Numba when available)"""
+    height, width = rgb.shape[:2]
+    bounds = region_bounds(height, width)
+    
+    if njit is not None:
+        channel_hist, gray_hist, region_sums = _fused_image_stats(
+            np.ascontiguousarray(rgb), bounds, max(1, min(get_num_threads(), height))
+        )
+    else:
+        pixels = rgb.reshape(-1, 3)
+        channel_hist = np.stack([np.bincount(pixels[:, c], minlength=256) for c in range(3)])
+        luma = (pixels.astype(np.uint32) @ np.array([19595, 38470, 7471], dtype=np.uint32) + 0x8000) >> 16
+        gray_hist = np.bincount(luma, minlength=256)
+        region_sums = np.array([rgb[y0:y1, x0:x1].sum(axis=(0, 1)) for y0, y1, x0, x1 in bounds])
+    
+    region_sizes = (bounds[:, 1] - bounds[:, 0]) * (bounds[:, 3] - bounds[:, 2])
+    region_means = region_sums / np.maximum(region_sizes, 1)[:, None]
+    return {
+        'channel_histograms': channel_hist,
+        'gray_histogram': gray_hist,
+        'region_means': dict(zip(REGION_NAMES, region_means))
+    }
+
+def analyze_image_colors(rgb, channel_histograms, find_dominant=True):
+    """Analyze color distribution in an RGB pixel array"""
     try:
-        with Image.open(image_path) as img:
-            # Convert to RGB if necessary
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Get image statistics
-            stat = ImageStat.Stat(img)
-            
-            # Get dominant colors
-            colors = img.getcolors(maxcolors=256*256*256)
-            if colors:
-                # Sort by frequency
-                colors.sort(key=lambda x: x[0], reverse=True)
-                dominant_colors = colors[:10]  # Top 10 colors
-            
+        pixels = rgb.reshape(-1, 3)
+        
+        # Get image statistics from per-channel histograms (as ImageStat does)
+        levels = np.arange(256)
+        mean_rgb = channel_histograms @ levels / len(pixels)
+        stddev_rgb = np.sqrt(np.maximum(channel_histograms @ levels**2 / len(pixels) - mean_rgb**2, 0))
+        
+        if not find_dominant:
             return {
-                'mean_rgb': stat.mean,
-                'stddev_rgb': stat.stddev,
-                'dominant_colors': dominant_colors[:5] if colors else None,
-                'total_colors': len(colors) if colors else 0
+                'mean_rgb': mean_rgb.tolist(),
+                'stddev_rgb': stddev_rgb.tolist(),
+                'dominant_colors': None,
+                'total_colors': None,
+                'total_pixels': len(pixels)
             }
+        
+        # Get dominant colors by counting packed 24-bit RGB keys
+        pixels = pixels.astype(np.uint32)
+        keys = (pixels[:, 0] << 16) | (pixels[:, 1] << 8) | pixels[:, 2]
+        colors, counts = np.unique(keys, return_counts=True)
+        
+        # Top 5 colors without sorting the full color table
+        top = min(5, len(colors))
+        top_idx = np.argpartition(counts, -top)[-top:]
+        top_idx = top_idx[np.argsort(counts[top_idx])[::-1]]
+        dominant_colors = [
+            (int(counts[i]), (int(colors[i] >> 16), int((colors[i] >> 8) & 0xFF), int(colors[i] & 0xFF)))
+            for i in top_idx
+        ]
+        
+        return {
+            'mean_rgb': mean_rgb.tolist(),
+            'stddev_rgb': stddev_rgb.tolist(),
+            'dominant_colors': dominant_colors,
+            'total_colors': len(colors),
+            'total_pixels': len(pixels)
+        }
     except Exception as e:
         return {'error': str(e)}
 
-def detect_ui_elements(image_path):
-    """Detect potential UI elements based on color patterns"""
+def detect_ui_elements(histogram):
+    """Detect potential UI elements from the 256-bin grayscale histogram"""
     try:
-        with Image.open(image_path) as img:
-            # Convert to grayscale for edge detection
-            gray = img.convert('L')
-            width, height = img.size
-            
-            # Analyze brightness distribution
-            pixels = list(gray.getdata())
-            brightness_stats = {
-                'mean': np.mean(pixels),
-                'std': np.std(pixels),
-                'min': min(pixels),
-                'max': max(pixels)
-            }
-            
-            # Detect potential text areas (high contrast regions)
-            contrast_threshold = brightness_stats['std'] * 0.5
-            high_contrast_pixels = [p for p in pixels if abs(p - brightness_stats['mean']) > contrast_threshold]
-            contrast_ratio = len(high_contrast_pixels) / len(pixels)
-            
-            # Detect potential background color (most common color)
-            color_counter = Counter(pixels)
-            most_common_color = color_counter.most_common(1)[0]
-            background_percentage = most_common_color[1] / len(pixels)
-            
-            return {
-                'brightness_stats': brightness_stats,
-                'contrast_ratio': contrast_ratio,
-                'background_color': most_common_color[0],
-                'background_percentage': background_percentage,
-                'has_high_contrast': contrast_ratio > 0.3
-            }
+        levels = np.arange(256)
+        total = histogram.sum()
+        present = np.flatnonzero(histogram)
+        
+        # Analyze brightness distribution
+        mean = histogram @ levels / total
+        brightness_stats = {
+            'mean': mean,
+            'std': np.sqrt(max(histogram @ levels**2 / total - mean**2, 0)),
+            'min': int(present[0]),
+            'max': int(present[-1])
+        }
+        
+        # Detect potential text areas (high contrast regions)
+        contrast_threshold = brightness_stats['std'] * 0.5
+        high_contrast_pixels = histogram[np.abs(levels - mean) > contrast_threshold].sum()
+        contrast_ratio = high_contrast_pixels / total
+        
+        # Detect potential background color (most common color)
+        background_color = int(histogram.argmax())
+        background_percentage = histogram[background_color] / total
+        
+        return {
+            'brightness_stats': brightness_stats,
+            'contrast_ratio': contrast_ratio,
+            'background_color': background_color,
+            'background_percentage': background_percentage,
+            'has_high_contrast': contrast_ratio > 0.3
+        }
     except Exception as e:
         return {'error': str(e)}
 
-def analyze_image_regions(image_path):
-    """Analyze different regions of the image"""
+def analyze_image_regions(region_means):
+    """Analyze different regions of the image from their mean RGB values"""
     try:
-        with Image.open(image_path) as img:
-            width, height = img.size
-            
-            # Divide image into regions
-            regions = {
-                'top_left': img.crop((0, 0, width//2, height//2)),
-                'top_right': img.crop((width//2, 0, width, height//2)),
-                'bottom_left': img.crop((0, height//2, width//2, height)),
-                'bottom_right': img.crop((width//2, height//2, width, height)),
-                'center': img.crop((width//4, height//4, 3*width//4, 3*height//4))
+        region_stats = {}
+        for region_name, mean_rgb in region_means.items():
+            region_stats[region_name] = {
+                'mean_brightness': np.mean(mean_rgb),
+                'brightness_variance': np.var(mean_rgb)
             }
-            
-            region_stats = {}
-            for region_name, region in regions.items():
-                stat = ImageStat.Stat(region)
-                region_stats[region_name] = {
-                    'mean_brightness': np.mean(stat.mean),
-                    'brightness_variance': np.var(stat.mean)
-                }
-            
-            return region_stats
+        
+        return region_stats
     except Exception as e:
         return {'error': str(e)}
 
@@ -129,75 +211,132 @@ def estimate_content_type(image_analysis):
     return suggestions
 
 def analyze_screenshot(image_path):
-    """Comprehensive analysis of a single screenshot"""
-    print(f"\n📸 Analyzing: {os.path.basename(image_path)}")
-    print("=" * 60)
-    
-    # Basic file info
-    file_size = os.path.getsize(image_path)
-    file_size_mb = file_size / (1024 * 1024)
+    """Comprehensive analysis of a single screenshot; returns a results dict"""
+    # Basic file info from a single stat call
+    file_size = os.stat(image_path).st_size
     
+    # Decode once and share the pixel arrays between all analyzers
     with Image.open(image_path) as img:
         width, height = img.size
-        aspect_ratio = width / height
+        mode = img.mode
+        
+        # The statistics are scale-invariant to within ~1%, so analyze huge images reduced
+        scale = -(-max(width, height) // MAX_ANALYSIS_SIZE)
+        if scale > 1:
+            # JPEG decodes straight to a reduced DCT scale; no-op for PNG
+            img.draft('RGB', (width // scale, height // scale))
+        analyzed = img.convert('RGB')
+        target = (-(-width // scale), -(-height // scale))
+        if analyzed.size == (width, height) and scale > 1:
+            analyzed = analyzed.reduce(scale)
+        elif analyzed.size != target:
+            # draft() already shrank the JPEG by a power of two; resize the rest of the way from there
+            analyzed = analyzed.resize(target, Image.Resampling.BOX)
+        
+        rgb = np.asarray(analyzed, dtype=np.uint8)
+    
+    stats = image_stats(rgb)
+    ui_analysis = detect_ui_elements(stats['gray_histogram'])
     
-    print(f"📁 File: {os.path.basename(image_path)}")
-    print(f"📐 Dimensions: {width} x {height} pixels")
-    print(f"📊 Aspect ratio: {aspect_ratio:.2f}")
-    print(f"💾 File size: {file_size_mb:.2f} MB")
-    print(f"🎨 Color mode: {img.mode}")
+    # Cheap prechecks: uniform images have no regional structure, tiny ones no useful palette
+    is_uniform = 'error' not in ui_analysis and ui_analysis['brightness_stats']['std'] < UNIFORM_STD_THRESHOLD
+    is_small = width * height < SMALL_IMAGE_PIXELS
+    
+    return {
+        'filename': os.path.basename(image_path),
+        'width': width,
+        'height': height,
+        'aspect_ratio': width / height,
+        'file_size_mb': file_size / (1024 * 1024),
+        'mode': mode,
+        'analyzed_size': (rgb.shape[1], rgb.shape[0]),
+        'colors': analyze_image_colors(rgb, stats['channel_histograms'], find_dominant=not is_small),
+        'ui': ui_analysis,
+        'regions': None if is_uniform else analyze_image_regions(stats['region_means'])
+    }
+
+def format_report(results):
+    """Format the results of analyze_screenshot as a printable report"""
+    lines = []
+    lines.append(f"\n📸 Analyzing: {results['filename']}")
+    lines.append("=" * 60)
+    
+    width, height = results['width'], results['height']
+    lines.append(f"📁 File: {results['filename']}")
+    lines.append(f"📐 Dimensions: {width} x {height} pixels")
+    lines.append(f"📊 Aspect ratio: {results['aspect_ratio']:.2f}")
+    lines.append(f"💾 File size: {results['file_size_mb']:.2f} MB")
+    lines.append(f"🎨 Color mode: {results['mode']}")
+    if results['analyzed_size'] != (width, height):
+        lines.append(f"🔎 Analyzed at: {results['analyzed_size'][0]} x {results['analyzed_size'][1]} pixels (downscaled)")
     
     # Color analysis
-    print(f"\n🎨 COLOR ANALYSIS")
-    print("-" * 30)
-    color_analysis = analyze_image_colors(image_path)
+    lines.append(f"\n🎨 COLOR ANALYSIS")
+    lines.append("-" * 30)
+    color_analysis = results['colors']
     if 'error' not in color_analysis:
-        print(f"📊 Mean RGB values: {[round(x, 1) for x in color_analysis['mean_rgb']]}")
-        print(f"📈 RGB standard deviation: {[round(x, 1) for x in color_analysis['stddev_rgb']]}")
-        print(f"🌈 Total unique colors: {color_analysis['total_colors']}")
+        lines.append(f"📊 Mean RGB values: {[round(x, 1) for x in color_analysis['mean_rgb']]}")
+        lines.append(f"📈 RGB standard deviation: {[round(x, 1) for x in color_analysis['stddev_rgb']]}")
+        if color_analysis['total_colors'] is not None:
+            # Box-averaging a downscaled image blends edges into new colors, so the count is only indicative
+            approximate = " (approximate, counted on downscaled image)" if results['analyzed_size'] != (width, height) else ""
+            lines.append(f"🌈 Total unique colors: {color_analysis['total_colors']}{approximate}")
         
         if color_analysis['dominant_colors']:
-            print("🎯 Top dominant colors:")
+            lines.append("🎯 Top dominant colors:")
             for i, (count, color) in enumerate(color_analysis['dominant_colors'], 1):
-                percentage = (count / (width * height)) * 100
-                print(f"   {i}. RGB{color} - {percentage:.1f}% of image")
+                percentage = (count / color_analysis['total_pixels']) * 100
+                lines.append(f"   {i}. RGB{color} - {percentage:.1f}% of image")
     else:
-        print(f"❌ Color analysis failed: {color_analysis['error']}")
+        lines.append(f"❌ Color analysis failed: {color_analysis['error']}")
     
     # UI element detection
-    print(f"\n🖥️  UI ELEMENT ANALYSIS")
-    print("-" * 30)
-    ui_analysis = detect_ui_elements(image_path)
+    lines.append(f"\n🖥️  UI ELEMENT ANALYSIS")
+    lines.append("-" * 30)
+    ui_analysis = results['ui']
     if 'error' not in ui_analysis:
         brightness = ui_analysis['brightness_stats']['mean']
         contrast = ui_analysis['contrast_ratio']
         background = ui_analysis['background_color']
         background_pct = ui_analysis['background_percentage']
         
-        print(f"💡 Average brightness: {brightness:.1f}/255")
-        print(f"🔍 Contrast ratio: {contrast:.2f}")
-        print(f"🎨 Background color: {background}/255 ({background_pct:.1%} of image)")
+        lines.append(f"💡 Average brightness: {brightness:.1f}/255")
+        lines.append(f"🔍 Contrast ratio: {contrast:.2f}")
+        lines.append(f"🎨 Background color: {background}/255 ({background_pct:.1%} of image)")
         
         # Content type suggestions
         suggestions = estimate_content_type(ui_analysis)
         if suggestions:
-            print("💭 Content suggestions:")
+            lines.append("💭 Content suggestions:")
             for suggestion in suggestions:
-                print(f"   • {suggestion}")
+                lines.append(f"   • {suggestion}")
     else:
-        print(f"❌ UI analysis failed: {ui_analysis['error']}")
+        lines.append(f"❌ UI analysis failed: {ui_analysis['error']}")
     
     # Regional analysis
-    print(f"\n🗺️  REGIONAL ANALYSIS")
-    print("-" * 30)
-    region_analysis = analyze_image_regions(image_path)
-    if 'error' not in region_analysis:
+    lines.append(f"\n🗺️  REGIONAL ANALYSIS")
+    lines.append("-" * 30)
+    region_analysis = results['regions']
+    if region_analysis is None:
+        lines.append("📍 Uniform image - no regional differences to report")
+    elif 'error' not in region_analysis:
         for region, stats in region_analysis.items():
             brightness = stats['mean_brightness']
             variance = stats['brightness_variance']
-            print(f"📍 {region.replace('_', ' ').title()}: brightness={brightness:.1f}, variance={variance:.1f}")
+            lines.append(f"📍 {region.replace('_', ' ').title()}: brightness={brightness:.1f}, variance={variance:.1f}")
     else:
-        print(f"❌ Regional analysis failed: {region_analysis['error']}")
+        lines.append(f"❌ Regional analysis failed: {region_analysis['error']}")
+    
+    return "\n".join(lines)
+
+def analyze_and_format(image_path):
+    """Analyze a screenshot and return its formatted report (runs inside pool workers)"""
+    return format_report(analyze_screenshot(image_path))
+
+def init_worker():
+    """Pool initializer: the pool already runs a process per core, so keep Numba to one thread each"""
+    if njit is not None:
+        set_num_threads(1)
 
 def main():
     """Main function"""
@@ -218,9 +357,12 @@ def main():
     
     print(f"📁 Found {len(png_files)} screenshot(s)")
     
-    for png_file in png_files:
-        analyze_screenshot(str(png_file))
-        print("\n" + "=" * 80)
+    # Screenshots are independent and CPU-bound, so analyze them in separate processes
+    with ProcessPoolExecutor(initializer=init_worker) as executor:
+        # Workers send back only the report text, keeping the pickled payload small
+        for report in executor.map(analyze_and_format, map(str, png_files)):
+            print(report)
+            print("\n" + "=" * 80)
     
     print("\n✅ Analysis complete!")
     print("\n💡 To extract text from screenshots:")
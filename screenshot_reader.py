@@ -5,118 +5,343 @@ Reads PNG screenshots and extracts text content using OCR
 """
 
 import os
+import io
+import re
+import json
+import hashlib
 import sys
+import mmap
+import itertools
+import contextlib
+import importlib.util
+import multiprocessing
 from pathlib import Path
-from PIL import Image
-import pytesseract
-import cv2
-import numpy as np
+
+# Tesseract's internal OpenMP threads fight the process pool; keep one per worker. This must be
+# set before tesserocr loads libtesseract, which reads it once, and forked workers inherit that
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# Missing packages are reported (and installed) by install_dependencies() before anything uses
+# them; importing each on its own keeps one failure from unbinding the others
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Set Tesseract path for Windows once per process rather than per image
+TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+if pytesseract is not None and os.path.exists(TESSERACT_PATH):
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+
+try:
+    from tesserocr import PyTessBaseAPI
+except ImportError:
+    PyTessBaseAPI = None
+
+# Longest edge handed to Tesseract; LSTM cost grows with pixel count and UI text stays legible
+MAX_OCR_EDGE = 1600
+
+# Resolution hint so Tesseract doesn't have to guess it for every image
+OCR_DPI = 150
+
+# One Tesseract engine per process, so the language model is loaded once instead of per call
+_tesseract_api = None
+
+def get_tesseract_api():
+    """Lazily create this process's persistent tesserocr engine"""
+    global _tesseract_api
+    if _tesseract_api is None:
+        _tesseract_api = PyTessBaseAPI(lang='eng')
+        _tesseract_api.SetVariable('user_defined_dpi', str(OCR_DPI))
+    return _tesseract_api
+
+def ocr_image(image, psm=3):
+    """OCR a PIL image or NumPy array; returns (text, mean word confidence 0-100)"""
+    if PyTessBaseAPI is None:
+        # pytesseract spawns a fresh tesseract process (and reloads the model) per call
+        data = pytesseract.image_to_data(
+            image, lang='eng', config=f'--psm {psm} --dpi {OCR_DPI}', output_type=pytesseract.Output.DICT
+        )
+        
+        # Rebuild the text line by line from the recognized words
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data['text']):
+            conf = float(data['conf'][i])
+            if conf > 0 and word.strip():
+                confidences.append(conf)
+                line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+                lines.setdefault(line_key, []).append(word)
+        text = "\n".join(" ".join(words) for words in lines.values())
+        return text, float(np.mean(confidences)) if confidences else 0.0
+    
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    api = get_tesseract_api()
+    api.SetPageSegMode(psm)
+    api.SetImage(image)
+    return api.GetUTF8Text(), api.MeanTextConf()
+
+# Import name -> pip package for each required dependency
+REQUIRED_PACKAGES = {
+    'PIL': 'pillow',
+    'pytesseract': 'pytesseract',
+    'cv2': 'opencv-python',
+    'numpy': 'numpy'
+}
 
 def install_dependencies():
     """Install required dependencies if not already installed"""
-    try:
-        import pytesseract
-        import cv2
-        from PIL import Image
+    # find_spec locates modules without importing them again
+    missing = [package for module, package in REQUIRED_PACKAGES.items()
+               if importlib.util.find_spec(module) is None]
+    if not missing:
         print("✓ All dependencies are already installed")
         return True
-    except ImportError as e:
-        print(f"✗ Missing dependency: {e}")
-        print("Installing required packages...")
-        os.system("pip install pillow pytesseract opencv-python")
-        print("Please restart the script after installation")
-        return False
-
-def preprocess_image(image_path):
-    """Preprocess image for better OCR results"""
+    
+    print(f"✗ Missing dependency: {', '.join(missing)}")
+    print("Installing required packages...")
+    os.system(f"pip install {' '.join(missing)}")
+    print("Please restart the script after installation")
+    return False
+
+def load_image(image_path):
+    """Decode an image from a read-only memory map; returns (BGR array, original PIL mode)"""
+    with open(image_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        # PIL only parses the header here; OpenCV does the single pixel decode
+        mode = Image.open(mapped).mode
+        buffer = np.frombuffer(mapped, dtype=np.uint8)
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        del buffer  # the map can't close while a view of it exists
+    
+    if image is None:
+        raise ValueError(f"Could not decode image: {image_path}")
+    return image, mode
+
+def to_grayscale(image):
+    """BT.601 luma of a BGR uint8 image using 8-bit fixed-point integer weights"""
+    if image.ndim == 2:
+        # Already single-channel (e.g. a pre-binarized screenshot)
+        return image
+    
+    # 29/150/77 out of 256 approximate 0.114 B + 0.587 G + 0.299 R; uint16 cannot overflow
+    b, g, r = (image[:, :, c].astype(np.uint16) for c in range(3))
+    return ((b * 29 + g * 150 + r * 77 + 128) >> 8).astype(np.uint8)
+
+# Local-mean threshold window (odd, in pixels) and offset; sized for UI text at MAX_OCR_EDGE
+ADAPTIVE_BLOCK_SIZE = 31
+ADAPTIVE_C = 10
+
+def preprocess_image(image):
+    """Preprocess an already-decoded BGR (or grayscale) image array for better OCR results"""
     try:
-        # Load image
-        image = cv2.imread(image_path)
-        
         # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = to_grayscale(image)
         
-        # Apply noise reduction
-        denoised = cv2.medianBlur(gray, 3)
+        # Mean-minus-C keeps only text darker than its surroundings; flip dark-mode screenshots first
+        if gray.mean() < 128:
+            gray = cv2.bitwise_not(gray)
         
-        # Apply threshold to get binary image
-        _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Threshold each pixel against its neighbourhood mean (integral image, one pass), so
+        # light menus and dark panels in the same screenshot both come out legible
+        thresh = cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+            ADAPTIVE_BLOCK_SIZE, ADAPTIVE_C
+        )
         
         return thresh
     except Exception as e:
         print(f"Error preprocessing image: {e}")
         return None
 
+# Below this spread the image is effectively blank; a single word on a 1600 px capture
+# already has a spread of about 3, so only flat images fall under it
+UNIFORM_STD_THRESHOLD = 2
+
+def is_uniform(gray):
+    """Cheap blank-page check so Tesseract isn't run on screenshots with nothing on them"""
+    return np.std(gray) < UNIFORM_STD_THRESHOLD
+
+# Extra page segmentation modes tried on the original image
+PSM_MODES = [6, 7, 8, 13]
+
+# OCR results keyed by image content and OCR settings, so unchanged screenshots aren't re-read
+CACHE_DIR = Path('.ocr_cache')
+
+def _hash(image_path):
+    """SHA-256 of a file, streamed through a fixed buffer rather than read into memory whole"""
+    with open(image_path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256')
+        
+        # Python < 3.11: same thing by hand, reusing one 1 MiB buffer
+        digest = hashlib.sha256()
+        buffer = memoryview(bytearray(1 << 20))
+        while n := f.readinto(buffer):
+            digest.update(buffer[:n])
+        return digest
+
+def ocr_cache_file(image_path):
+    """Cache entry for an image; any change to the pixels or the OCR setup gives a new key"""
+    config = (
+        f"{'tesserocr' if PyTessBaseAPI is not None else 'pytesseract'}|dpi={OCR_DPI}|edge={MAX_OCR_EDGE}"
+        f"|psm={PSM_MODES}|adaptive={ADAPTIVE_BLOCK_SIZE},{ADAPTIVE_C}|uniform={UNIFORM_STD_THRESHOLD}"
+        f"|early_exit={MIN_CONFIDENCE},{MIN_TEXT_LENGTH}"
+    )
+    digest = _hash(image_path)
+    digest.update(config.encode())
+    return CACHE_DIR / f"{digest.hexdigest()}.json"
+
+def load_ocr_cache(cache_file):
+    """Cached results for an image, or None if missing or corrupt so the image is OCRed again"""
+    try:
+        return json.loads(cache_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+def store_ocr_cache(cache_file, results):
+    """Persist results unless a pass failed (e.g. Tesseract missing), then hand them back"""
+    if None not in results.values():
+        # Write beside the entry and rename, so an interrupted run never leaves half a file
+        temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            CACHE_DIR.mkdir(exist_ok=True)
+            temp_file.write_text(json.dumps(results), encoding='utf-8')
+            os.replace(temp_file, cache_file)
+        except OSError:
+            pass  # caching is best effort
+    return results
+
+# A preprocessed pass above both limits is trusted and the remaining passes are skipped
+MIN_CONFIDENCE = 70
+MIN_TEXT_LENGTH = 50
+
 def extract_text_from_screenshot(image_path):
     """Extract text from screenshot using OCR"""
     try:
         print(f"\n📸 Analyzing: {os.path.basename(image_path)}")
         print("=" * 50)
         
-        # Check if file exists
-        if not os.path.exists(image_path):
+        # Check if file exists; the stat result is reused for the size below
+        try:
+            file_stat = os.stat(image_path)
+        except FileNotFoundError:
             print(f"❌ File not found: {image_path}")
             return None
         
-        # Set Tesseract path for Windows
-        tesseract_path = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-        if os.path.exists(tesseract_path):
-            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        cache_file = ocr_cache_file(image_path)
+        cached = load_ocr_cache(cache_file)
+        if cached is not None:
+            print("♻️  Using cached OCR results")
+            return cached
+        
+        # Decode once; every OCR pass and the preprocessing reuse the same pixels
+        cv_img, mode = load_image(image_path)
+        pil_img = Image.fromarray(np.ascontiguousarray(cv_img[:, :, ::-1]))
         
         # Get image info
-        with Image.open(image_path) as img:
-            width, height = img.size
-            print(f"📐 Image dimensions: {width}x{height}")
-            print(f"🎨 Image mode: {img.mode}")
-            print(f"💾 File size: {os.path.getsize(image_path)} bytes")
+        height, width = cv_img.shape[:2]
+        print(f"📐 Image dimensions: {width}x{height}")
+        print(f"🎨 Image mode: {mode}")
+        print(f"💾 File size: {file_stat.st_size} bytes")
+        
+        # Downscale oversized screenshots once; all OCR passes below use the smaller image
+        scale = min(1.0, MAX_OCR_EDGE / max(width, height))
+        if scale < 1.0:
+            size = (int(width * scale), int(height * scale))
+            cv_img = cv2.resize(cv_img, size, interpolation=cv2.INTER_AREA)
+            pil_img = Image.fromarray(np.ascontiguousarray(cv_img[:, :, ::-1]))
+            print(f"🔍 Downscaled to {size[0]}x{size[1]} for OCR (scale {scale:.2f})")
         
         # Try different OCR approaches
         results = {}
+        confidences = {}
         
-        # Method 1: Direct OCR on original image
-        try:
-            original_text = pytesseract.image_to_string(Image.open(image_path), lang='eng')
-            results['original'] = original_text.strip()
-            print(f"✅ Original image OCR completed")
-        except Exception as e:
-            print(f"❌ Original image OCR failed: {e}")
-            results['original'] = None
+        # Grayscale once; it drives both the blank check and the preprocessing
+        gray = to_grayscale(cv_img)
+        if is_uniform(gray):
+            print("⏭️  Image is blank - skipping OCR")
+            results['original'] = ''
+            return results
         
-        # Method 2: OCR on preprocessed image
+        # Method 1: OCR on preprocessed image; usually good enough to stop right here
         try:
-            preprocessed = preprocess_image(image_path)
+            preprocessed = preprocess_image(gray)
             if preprocessed is not None:
-                preprocessed_text = pytesseract.image_to_string(preprocessed, lang='eng')
+                preprocessed_text, confidences['preprocessed'] = ocr_image(preprocessed)
                 results['preprocessed'] = preprocessed_text.strip()
-                print(f"✅ Preprocessed image OCR completed")
+                print(f"✅ Preprocessed image OCR completed (confidence {confidences['preprocessed']:.0f}%)")
+                
+                if (confidences['preprocessed'] > MIN_CONFIDENCE
+                        and len(results['preprocessed']) > MIN_TEXT_LENGTH):
+                    print("⏭️  Confident result - skipping remaining OCR passes")
+                    return store_ocr_cache(cache_file, results)
             else:
                 results['preprocessed'] = None
         except Exception as e:
             print(f"❌ Preprocessed image OCR failed: {e}")
             results['preprocessed'] = None
         
+        # Method 2: Direct OCR on original image
+        try:
+            original_text, confidences['original'] = ocr_image(pil_img)
+            results['original'] = original_text.strip()
+            print(f"✅ Original image OCR completed (confidence {confidences['original']:.0f}%)")
+        except Exception as e:
+            print(f"❌ Original image OCR failed: {e}")
+            results['original'] = None
+        
         # Method 3: OCR with different page segmentation modes
         try:
             # Try different PSM modes for better text detection
-            psm_modes = [6, 7, 8, 13]  # Different page segmentation modes
-            for psm in psm_modes:
+            for psm in PSM_MODES:
                 try:
-                    config = f'--psm {psm}'
-                    text = pytesseract.image_to_string(Image.open(image_path), config=config)
+                    text, confidence = ocr_image(pil_img, psm=psm)
                     if text.strip() and len(text.strip()) > 10:  # Only save if substantial text found
                         results[f'psm_{psm}'] = text.strip()
-                        print(f"✅ PSM mode {psm} OCR completed")
+                        confidences[f'psm_{psm}'] = confidence
+                        print(f"✅ PSM mode {psm} OCR completed (confidence {confidence:.0f}%)")
                 except Exception as e:
                     continue
         except Exception as e:
             print(f"❌ PSM modes OCR failed: {e}")
         
-        return results
+        if confidences:
+            best = max(confidences, key=confidences.get)
+            print(f"🏆 Most confident method: {best} ({confidences[best]:.0f}%)")
+        
+        return store_ocr_cache(cache_file, results)
         
     except Exception as e:
         print(f"❌ Error extracting text from {image_path}: {e}")
         return None
 
+def ocr_worker(image_path):
+    """Pool worker: run OCR on one screenshot, capturing its progress output for the parent"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        text_results = extract_text_from_screenshot(image_path)
+    return text_results, output.getvalue()
+
+# UI keywords to look for in OCR output, matched as whole words in a single regex pass
+KEYWORDS = ['error', 'warning', 'success', 'button', 'click', 'input', 'form', 'api', 'data']
+KEYWORD_PATTERN = re.compile(r'\b(' + '|'.join(map(re.escape, KEYWORDS)) + r')\b', re.IGNORECASE)
+
 def analyze_screenshot_content(text_results):
     """Analyze the extracted text content"""
     if not text_results:
@@ -129,21 +354,24 @@ def analyze_screenshot_content(text_results):
         if text and len(text.strip()) > 0:
             print(f"\n🔍 Method: {method}")
             print(f"📝 Text length: {len(text)} characters")
-            print(f"📄 Number of lines: {len(text.splitlines())}")
+            # Count newlines instead of materializing every line just to show ten of them
+            num_lines = text.count('\n') + (not text.endswith('\n'))
+            print(f"📄 Number of lines: {num_lines}")
             
-            # Show first few lines
-            lines = text.splitlines()
+            # Show first few non-empty lines
             print("📋 Content preview:")
-            for i, line in enumerate(lines[:10]):  # Show first 10 lines
-                if line.strip():
-                    print(f"   {i+1:2d}: {line.strip()}")
+            non_empty = filter(str.strip, text.splitlines())
+            for i, line in enumerate(itertools.islice(non_empty, 10)):
+                print(f"   {i+1:2d}: {line.strip()}")
             
-            if len(lines) > 10:
-                print(f"   ... and {len(lines) - 10} more lines")
+            # Whatever the preview didn't consume is left in the iterator
+            remaining = sum(1 for _ in non_empty)
+            if remaining:
+                print(f"   ... and {remaining} more lines")
             
             # Look for specific patterns
-            keywords = ['error', 'warning', 'success', 'button', 'click', 'input', 'form', 'api', 'data']
-            found_keywords = [kw for kw in keywords if kw.lower() in text.lower()]
+            matches = {match.lower() for match in KEYWORD_PATTERN.findall(text)}
+            found_keywords = [kw for kw in KEYWORDS if kw in matches]
             if found_keywords:
                 print(f"🔑 Keywords found: {', '.join(found_keywords)}")
             
@@ -176,13 +404,15 @@ def main():
     for png_file in png_files:
         print(f"   • {png_file.name}")
     
-    # Analyze each screenshot
-    for png_file in png_files:
-        text_results = extract_text_from_screenshot(str(png_file))
-        if text_results:
-            analyze_screenshot_content(text_results)
-        
-        print("\n" + "=" * 80)
+    # Analyze screenshots in parallel; each worker drives its own Tesseract processes
+    processes = min(multiprocessing.cpu_count(), len(png_files))
+    with multiprocessing.Pool(processes=processes, maxtasksperchild=8) as pool:
+        for text_results, output in pool.imap_unordered(ocr_worker, [str(p) for p in png_files]):
+            print(output, end="")
+            if text_results:
+                analyze_screenshot_content(text_results)
+            
+            print("\n" + "=" * 80)
     
     print("\n✅ Analysis complete!")
 
@@ -6,15 +6,36 @@ Provides basic information about PNG screenshots without requiring OCR dependenc
 
 import os
 import sys
+import struct
 from pathlib import Path
 
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# IHDR color type -> PIL mode, for the common 8-bit images
+PNG_MODES = {0: 'L', 2: 'RGB', 3: 'P', 4: 'LA', 6: 'RGBA'}
+
+def _png_wh(image_path):
+    """Read (width, height, mode) straight from a PNG's IHDR chunk; None if PIL is needed"""
+    with open(image_path, 'rb') as f:
+        header = f.read(26)
+    if len(header) < 26 or header[:8] != PNG_SIGNATURE or header[12:16] != b'IHDR':
+        return None
+    
+    width, height = struct.unpack('>II', header[16:24])
+    bit_depth, color_type = header[24], header[25]
+    # Other bit depths map to PIL modes like '1' or 'I;16'; leave those to PIL
+    if color_type not in PNG_MODES or (bit_depth != 8 and color_type != 3):
+        return None
+    return width, height, PNG_MODES[color_type]
+
 def get_image_info(image_path):
     """Get basic information about an image file"""
     try:
-        if not os.path.exists(image_path):
+        # One stat call answers both "does it exist" and "how big is it"
+        try:
+            file_size = os.stat(image_path).st_size
+        except FileNotFoundError:
             return None
-        
-        file_size = os.path.getsize(image_path)
         file_size_mb = file_size / (1024 * 1024)
         
         info = {
@@ -24,6 +45,13 @@ def get_image_info(image_path):
             'exists': True
         }
         
+        # PNG dimensions are in the first 26 bytes; no need to spin up a decoder for them
+        png = _png_wh(image_path)
+        if png is not None:
+            info['width'], info['height'], info['mode'] = png
+            info['format'] = 'PNG'
+            return info
+        
         # Try to get image dimensions using PIL if available
         try:
             from PIL import Image
@@ -62,12 +90,13 @@ def analyze_screenshot_directory(directory="Screen"):
     
     print(f"📁 Found {len(png_files)} screenshot(s) in '{directory}' directory:\n")
     
-    for i, png_file in enumerate(png_files, 1):
+    # Gather file info once; the listing and the summary both use it
+    infos = [get_image_info(str(png_file)) for png_file in png_files]
+    
+    for i, (png_file, info) in enumerate(zip(png_files, infos), 1):
         print(f"📸 Screenshot #{i}: {png_file.name}")
         print("-" * 40)
         
-        info = get_image_info(str(png_file))
-        
         if info and 'error' not in info:
             print(f"📁 File: {info['filename']}")
             print(f"💾 Size: {info['file_size_mb']} MB ({info['file_size_bytes']:,} bytes)")
@@ -99,7 +128,7 @@ def analyze_screenshot_directory(directory="Screen"):
     
     print("📋 Summary:")
     print(f"   • Total screenshots: {len(png_files)}")
-    total_size = sum(get_image_info(str(f)).get('file_size_mb', 0) for f in png_files)
+    total_size = sum(info.get('file_size_mb', 0) for info in infos if info)
     print(f"   • Total size: {total_size:.2f} MB")
     
     # Provide suggestions for further analysis
@@ -5,6 +5,22 @@ Simple deployment test to check what's happening
 
 import requests
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared session: attempts against the same host reuse the TCP/TLS connection,
+# and transient gateway errors are retried with backoff. Only status codes are
+# retried (a hung host still times out once), and the last response is returned
+# rather than raised so its status gets reported.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(
+        total=3, connect=0, read=False, other=0, backoff_factor=0.3,
+        status_forcelist=[502, 503, 504], raise_on_status=False
+    )
+))
 
 def test_with_retries():
     """Test the deployment with retries and different methods"""
@@ -16,7 +32,7 @@ def test_with_retries():
     # Test 1: Basic GET request
     print("1. Basic GET request...")
     try:
-        response = requests.get(url, timeout=15)
+        response = SESSION.get(url, timeout=15)
         print(f"   Status: {response.status_code}")
         print(f"   Content-Type: {response.headers.get('Content-Type')}")
         print(f"   Content-Length: {len(response.content)}")
@@ -40,7 +56,7 @@ def test_with_retries():
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     }
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = SESSION.get(url, headers=headers, timeout=15)
         print(f"   Status: {response.status_code}")
         if response.status_code == 200:
             print("   ✅ Success with different user agent!")
@@ -59,7 +75,7 @@ def test_with_retries():
         ip_url = f"https://{ip}"
         headers = {'Host': 'statistical-webapp-dify.vercel.app'}
         
-        response = requests.get(ip_url, headers=headers, timeout=15, verify=False)
+        response = SESSION.get(ip_url, headers=headers, timeout=15, verify=False)
         print(f"   Status via IP: {response.status_code}")
         if response.status_code == 200:
             print("   ✅ Success via IP!")
@@ -3,84 +3,83 @@
 Debug Vercel deployment issues
 """
 
-import requests
 import socket
 import ssl
 import time
+import http.client
 from urllib.parse import urlparse
 
-def test_connection(hostname, port=443):
-    """Test basic TCP connection"""
-    try:
-        sock = socket.create_connection((hostname, port), timeout=10)
-        sock.close()
-        return True
-    except Exception as e:
-        print(f"❌ TCP connection failed: {e}")
-        return False
-
-def test_ssl_handshake(hostname):
-    """Test SSL handshake"""
-    try:
-        context = ssl.create_default_context()
-        with socket.create_connection((hostname, 443), timeout=10) as sock:
-            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                cert = ssock.getpeercert()
-                print(f"✅ SSL handshake successful")
-                print(f"   Subject: {cert.get('subject', 'Unknown')}")
-                print(f"   Issuer: {cert.get('issuer', 'Unknown')}")
-                return True
-    except Exception as e:
-        print(f"❌ SSL handshake failed: {e}")
-        return False
-
-def test_http_request(url):
-    """Test HTTP request with different methods"""
+def test_http_request(url, ip):
+    """Test TCP, SSL and HTTP over a single connection, timing each phase; ip is resolved up front"""
     print(f"\n🧪 Testing HTTP request to: {url}")
     
     # Parse URL
     parsed = urlparse(url)
     hostname = parsed.hostname
+    port = parsed.port or 443
     
     print(f"Hostname: {hostname}")
-    print(f"Port: {parsed.port or (443 if parsed.scheme == 'https' else 80)}")
+    print(f"Port: {port}")
     
     # Test 1: Basic TCP connection
     print("\n1. Testing TCP connection...")
-    if not test_connection(hostname, parsed.port or 443):
+    try:
+        start = time.perf_counter()
+        sock = socket.create_connection((ip, port), timeout=10)
+        print(f"✅ TCP connected in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except Exception as e:
+        print(f"❌ TCP connection failed: {e}")
         return False
     
-    # Test 2: SSL handshake
+    # Test 2: SSL handshake on the same socket
     print("\n2. Testing SSL handshake...")
-    if not test_ssl_handshake(hostname):
+    try:
+        start = time.perf_counter()
+        context = ssl.create_default_context()
+        ssock = context.wrap_socket(sock, server_hostname=hostname)
+        cert = ssock.getpeercert()
+        print(f"✅ SSL handshake successful in {(time.perf_counter() - start) * 1000:.0f} ms")
+        print(f"   Subject: {cert.get('subject', 'Unknown')}")
+        print(f"   Issuer: {cert.get('issuer', 'Unknown')}")
+    except Exception as e:
+        sock.close()
+        print(f"❌ SSL handshake failed: {e}")
         return False
     
-    # Test 3: HTTP request
+    # Test 3: HTTP request over the already-established TLS connection
     print("\n3. Testing HTTP request...")
+    conn = http.client.HTTPSConnection(hostname, port, timeout=15)
+    # The connection adopts our socket as-is, so give it the 15 s request timeout ourselves
+    ssock.settimeout(15)
+    conn.sock = ssock
     try:
-        response = requests.get(url, timeout=15, verify=True)
-        print(f"   Status: {response.status_code}")
-        print(f"   Headers: {dict(list(response.headers.items())[:5])}")
-        return response.status_code == 200
-    except requests.exceptions.ConnectionError as e:
+        start = time.perf_counter()
+        conn.request("GET", parsed.path or "/")
+        response = conn.getresponse()
+        print(f"   Status: {response.status} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        print(f"   Headers: {dict(response.getheaders()[:5])}")
+        return response.status == 200
+    except ConnectionError as e:
         print(f"   ❌ Connection error: {e}")
         return False
-    except requests.exceptions.Timeout:
+    except TimeoutError:
         print(f"   ❌ Request timeout")
         return False
     except Exception as e:
         print(f"   ❌ Error: {e}")
         return False
+    finally:
+        conn.close()
 
 def check_dns_resolution(hostname):
-    """Check DNS resolution"""
+    """Check DNS resolution; returns the resolved IP, or None on failure"""
     try:
         ip = socket.gethostbyname(hostname)
         print(f"✅ DNS resolution: {hostname} → {ip}")
-        return True
+        return ip
     except socket.gaierror as e:
         print(f"❌ DNS resolution failed: {e}")
-        return False
+        return None
 
 def main():
     url = "https://statistical-webapp-dify-bhvo73pl9-kwtsangs-projects.vercel.app"
@@ -95,14 +94,16 @@ def main():
     # Test 1: DNS resolution
     print("1. DNS Resolution Test")
     print("-" * 30)
-    if not check_dns_resolution(hostname):
+    # Resolve once; the connection tests reuse the address
+    ip = check_dns_resolution(hostname)
+    if not ip:
         print("❌ DNS resolution failed - this is the root cause")
         return
     
     # Test 2: Connection tests
     print("\n2. Connection Tests")
     print("-" * 30)
-    success = test_http_request(url)
+    success = test_http_request(url, ip)
     
     if not success:
         print("\n❌ Connection tests failed")